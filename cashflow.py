@@ -1,15 +1,50 @@
 import argparse
 import json
-import uuid
-from dataclasses import dataclass, asdict
-from datetime import datetime
+import math
+import mmap
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass
+from heapq import merge
+from itertools import filterfalse
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
-DATA_FILE = Path("cashflow_data.json")
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup; fall back to the stdlib
+    orjson = None
 
+# One JSON-encoded transaction per line, so adding a transaction is an append.
+DATA_FILE = Path("cashflow_data.jsonl")
 
-@dataclass
+_VALID_TYPES = frozenset(("inflow", "outflow"))
+_VALID_RECURRENCES = frozenset(("one-time", "recurring"))
+
+_MONTH_RE = re.compile(r"[0-9]{4}-(0[1-9]|1[0-2])")
+_MONTH_FIELDS = ("month", "start_month", "end_month")
+# strptime("%Y-%m"), used by older versions, also accepted single-digit months.
+_LEGACY_MONTH_RE = re.compile(r"([0-9]{4})-([0-9]{1,2})")
+
+# Seeded once from os.urandom; ids only need to be unique, not unpredictable.
+_ID_RANDOM = random.Random()
+
+# Month key used for recurring items without an end month.
+_NO_END = 2**31 - 1
+
+# Parsed DATA_FILE keyed on its (mtime, size); load_data hands out copies.
+_CACHE = {"path": None, "version": None, "data": None}
+
+# Columns and per-month active rows for the cached data, keyed on its (path, version).
+_COLUMNS = {"version": None, "columns": None}
+
+# Parser built by the first main() call and reused by later ones.
+_PARSER: Optional[argparse.ArgumentParser] = None
+
+
+@dataclass(slots=True)
 class Transaction:
     description: str
     amount: float
@@ -23,30 +58,188 @@ class Transaction:
 
     def __post_init__(self):
         if not self.id:
-            self.id = str(uuid.uuid4())
-        if self.type not in {"inflow", "outflow"}:
-            raise ValueError("type must be 'inflow' or 'outflow'")
-        if self.recurrence not in {"one-time", "recurring"}:
-            raise ValueError("recurrence must be 'one-time' or 'recurring'")
-        if self.recurrence == "one-time" and not self.month:
-            raise ValueError("one-time transactions require a month (YYYY-MM)")
-        if self.recurrence == "recurring" and not self.start_month:
-            raise ValueError("recurring transactions require start_month (YYYY-MM)")
+            self.id = _new_id()
+        _validate_transaction(self.amount, self.type, self.recurrence, self.month, self.start_month)
+
+    def to_dict(self) -> Dict:
+        """Return the stored form of this transaction (a flat copy; cheaper than asdict)."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _validate_transaction(
+    amount: float, type: str, recurrence: str, month: Optional[str], start_month: Optional[str]
+) -> None:
+    if not math.isfinite(amount):
+        raise ValueError("amount must be a finite number")
+    if type not in _VALID_TYPES:
+        raise ValueError("type must be 'inflow' or 'outflow'")
+    if recurrence not in _VALID_RECURRENCES:
+        raise ValueError("recurrence must be 'one-time' or 'recurring'")
+    if recurrence == "one-time" and not month:
+        raise ValueError("one-time transactions require a month (YYYY-MM)")
+    if recurrence == "recurring" and not start_month:
+        raise ValueError("recurring transactions require start_month (YYYY-MM)")
+
+
+def _new_id() -> str:
+    """Return a unique id: the current time in ns plus 32 random bits, in hex."""
+    return f"{time.time_ns():x}-{_ID_RANDOM.getrandbits(32):08x}"
 
 
 def parse_month(value: str) -> str:
-    datetime.strptime(value, "%Y-%m")
+    if not _MONTH_RE.fullmatch(value):
+        raise ValueError(f"month must be in YYYY-MM format, got {value!r}")
     return value
 
 
-def load_data() -> Dict[str, List[Dict]]:
-    if not DATA_FILE.exists():
+def validate_months(months: Iterable[Optional[str]]) -> None:
+    """Check a whole column of months at once; None entries are skipped."""
+    invalid = list(filterfalse(_MONTH_RE.fullmatch, filter(None, months)))
+    if invalid:
+        raise ValueError(f"months must be in YYYY-MM format, got {', '.join(map(repr, invalid[:5]))}")
+
+
+def _validate_stored_months(txns: List[Dict]) -> None:
+    validate_months(txn.get(field) for txn in txns for field in _MONTH_FIELDS)
+
+
+def _normalize_legacy_months(txns: List[Dict]) -> None:
+    """Zero-pad months such as 2024-1 that older versions stored, in place."""
+    for txn in txns:
+        for field in _MONTH_FIELDS:
+            match = isinstance(txn.get(field), str) and _LEGACY_MONTH_RE.fullmatch(txn[field])
+            if match:
+                txn[field] = f"{match[1]}-{int(match[2]):02d}"
+
+
+def _month_key(value: str) -> int:
+    """Encode a YYYY-MM month as year * 12 + month so months compare as ints."""
+    year, month = value.split("-")
+    return int(year) * 12 + int(month)
+
+
+def parse_amount(value: str) -> float:
+    amount = float(value)
+    if not math.isfinite(amount):
+        raise ValueError(f"amount must be a finite number, got {value!r}")
+    return amount
+
+
+def _finite_amounts(txns: List[Dict]) -> bool:
+    return all(not isinstance(txn.get("amount"), float) or math.isfinite(txn["amount"]) for txn in txns)
+
+
+def _loads(raw: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN or escaped lone surrogates, which the stdlib accepts
+    return json.loads(raw)
+
+
+def _dump_lines(txns: List[Dict]) -> bytes:
+    # orjson would write NaN and infinities as null, so leave those to the stdlib.
+    if orjson is not None and _finite_amounts(txns):
+        try:
+            return b"".join(orjson.dumps(txn) + b"\n" for txn in txns)
+        except orjson.JSONEncodeError:
+            pass  # e.g. lone surrogates from undecodable argv bytes, which the stdlib escapes
+    return "".join(json.dumps(txn, separators=(",", ":")) + "\n" for txn in txns).encode("utf-8")
+
+
+def _dumps_pretty(data: Dict[str, List[Dict]]) -> bytes:
+    if orjson is not None and _finite_amounts(data["transactions"]):
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def _file_version(stat) -> Tuple[int, int]:
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _remember(data: Optional[Dict[str, List[Dict]]]) -> None:
+    _CACHE["path"] = DATA_FILE
+    _CACHE["version"] = _file_version(DATA_FILE.stat()) if data is not None else None
+    _CACHE["data"] = data
+
+
+def _copy_transactions(txns: List[Dict]) -> List[Dict]:
+    return [dict(txn) for txn in txns]
+
+
+def _legacy_file() -> Optional[Path]:
+    legacy = DATA_FILE.with_suffix(".json")
+    return None if legacy == DATA_FILE else legacy
+
+
+def _migrate_legacy_file() -> None:
+    """Convert a single-document cashflow_data.json next to DATA_FILE to JSON Lines, once."""
+    legacy = _legacy_file()
+    if legacy is None or DATA_FILE.exists() or not legacy.exists():
+        return
+    data = _loads(legacy.read_bytes())
+    _normalize_legacy_months(data.get("transactions", []))
+    _validate_stored_months(data.get("transactions", []))
+    save_data(data)
+    legacy.unlink()
+
+
+def _read_transactions() -> List[Dict]:
+    # Parse straight from a read-only mapping instead of copying the file into one bytes object.
+    with DATA_FILE.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return [_loads(line) for line in iter(mm.readline, b"") if line.strip()]
+
+
+def _load_cached() -> Dict[str, List[Dict]]:
+    """Return the cached data, re-reading DATA_FILE if it changed. Do not modify the result."""
+    _migrate_legacy_file()
+    try:
+        stat = DATA_FILE.stat()
+    except FileNotFoundError:
+        _remember(None)
         return {"transactions": []}
-    return json.loads(DATA_FILE.read_text())
+    if _CACHE["path"] == DATA_FILE and _CACHE["version"] == _file_version(stat):
+        return _CACHE["data"]
+    # mmap refuses empty files.
+    data = {"transactions": _read_transactions() if stat.st_size else []}
+    _remember(data)
+    return data
+
+
+def load_data() -> Dict[str, List[Dict]]:
+    return {"transactions": _copy_transactions(_load_cached()["transactions"])}
 
 
 def save_data(data: Dict[str, List[Dict]]) -> None:
-    DATA_FILE.write_text(json.dumps(data, indent=2))
+    txns = data.get("transactions", [])
+    DATA_FILE.write_bytes(_dump_lines(txns))
+    _remember({"transactions": _copy_transactions(txns)})
+
+
+def append_transactions(txns: List[Dict]) -> None:
+    """Append transactions to the data file without rewriting the existing lines."""
+    _validate_stored_months(txns)
+    payload = _dump_lines(txns)
+    _migrate_legacy_file()
+    cached = None
+    if not DATA_FILE.exists():
+        cached = {"transactions": []}
+    elif _CACHE["path"] == DATA_FILE and _CACHE["version"] == _file_version(DATA_FILE.stat()):
+        cached = _CACHE["data"]
+    with DATA_FILE.open("a+b") as f:
+        # A hand-edited file may lack its final newline; don't glue two objects together.
+        if f.seek(0, 2):
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                payload = b"\n" + payload
+        f.write(payload)
+    if cached is not None:
+        cached["transactions"].extend(_copy_transactions(txns))
+    _remember(cached)
 
 
 def is_active_in_month(txn: Dict, target_month: str) -> bool:
@@ -62,10 +255,99 @@ def is_active_in_month(txn: Dict, target_month: str) -> bool:
     return True
 
 
+def _columns(txns: List[Dict]) -> Dict:
+    starts = []
+    ends = []
+    by_month: Dict[int, List[int]] = {}
+    recurring_rows = []
+    for row, txn in enumerate(txns):
+        if txn["recurrence"] == "one-time":
+            # Found through by_month only; no month means never active, as in is_active_in_month.
+            if txn.get("month"):
+                by_month.setdefault(_month_key(txn["month"]), []).append(row)
+            start, end = _NO_END, 0
+        else:
+            start = _month_key(txn["start_month"]) if txn.get("start_month") else 0
+            end = _month_key(txn["end_month"]) if txn.get("end_month") else _NO_END
+            recurring_rows.append(row)
+        starts.append(start)
+        ends.append(end)
+    return {
+        "amounts": tuple(txn["amount"] for txn in txns),
+        "is_inflow": tuple(txn["type"] == "inflow" for txn in txns),
+        "starts": tuple(starts),
+        "ends": tuple(ends),
+        "by_month": by_month,
+        "recurring_rows": tuple(recurring_rows),
+        # Active rows per month key, filled in as months are queried.
+        "active": {},
+    }
+
+
+def _active_rows(columns: Dict, target: int) -> List[int]:
+    """Return the ascending row indices active in the month key target, memoized per month."""
+    rows = columns["active"].get(target)
+    if rows is None:
+        starts = columns["starts"]
+        ends = columns["ends"]
+        recurring = [row for row in columns["recurring_rows"] if starts[row] <= target <= ends[row]]
+        # Both row lists are ascending, so merging keeps the original order.
+        rows = list(merge(columns["by_month"].get(target, ()), recurring))
+        columns["active"][target] = rows
+    return rows
+
+
+def _scan(txns: List[Dict], target_month: str) -> Tuple[float, float, List[Dict]]:
+    """Return (inflows, outflows, active transactions) for target_month in one pass."""
+    inflows = outflows = 0.0
+    active = []
+    for txn in txns:
+        if not is_active_in_month(txn, target_month):
+            continue
+        active.append(txn)
+        if txn["type"] == "inflow":
+            inflows += txn["amount"]
+        else:
+            outflows += txn["amount"]
+    return inflows, outflows, active
+
+
+def _query_loaded(target_month: str) -> Tuple[float, float, List[Dict]]:
+    """Like _scan over the cached data, indexing it from the second query on; do not modify the result."""
+    txns = _load_cached()["transactions"]
+    version = (_CACHE["path"], _CACHE["version"])
+    if _CACHE["version"] is None or _COLUMNS["version"] != version:
+        # A one-shot CLI call only ever asks once, so a plain scan is cheapest.
+        _COLUMNS.update(version=version, columns=None)
+        return _scan(txns, target_month)
+    if _COLUMNS["columns"] is None:
+        _COLUMNS["columns"] = _columns(txns)
+    inflows, outflows, rows = _summary_kernel(_COLUMNS["columns"], _month_key(target_month))
+    return inflows, outflows, [txns[row] for row in rows]
+
+
+def _summary_kernel(columns: Dict, target: int) -> Tuple[float, float, List[int]]:
+    """Return (inflows, outflows, active row indices) for the month key target in one pass."""
+    amounts = columns["amounts"]
+    is_inflow = columns["is_inflow"]
+    inflows = outflows = 0.0
+    rows = _active_rows(columns, target)
+    for row in rows:
+        if is_inflow[row]:
+            inflows += amounts[row]
+        else:
+            outflows += amounts[row]
+    return inflows, outflows, rows
+
+
 def calculate_summary(data: Dict[str, List[Dict]], target_month: str, opening_balance: float) -> Dict:
-    active_txns = [txn for txn in data.get("transactions", []) if is_active_in_month(txn, target_month)]
-    inflows = sum(txn["amount"] for txn in active_txns if txn["type"] == "inflow")
-    outflows = sum(txn["amount"] for txn in active_txns if txn["type"] == "outflow")
+    inflows, outflows, active_txns = _scan(data.get("transactions", []), target_month)
+    return _summary_dict(target_month, opening_balance, inflows, outflows, active_txns)
+
+
+def _summary_dict(
+    target_month: str, opening_balance: float, inflows: float, outflows: float, active_txns: List[Dict]
+) -> Dict:
     net = inflows - outflows
     closing_balance = opening_balance + net
     return {
@@ -79,44 +361,58 @@ def calculate_summary(data: Dict[str, List[Dict]], target_month: str, opening_ba
     }
 
 
+def _build_txn_dict(args: argparse.Namespace) -> Dict:
+    """Build the stored form of a transaction directly, with Transaction's validation."""
+    recurrence = "recurring" if args.recurring else "one-time"
+    _validate_transaction(args.amount, args.type, recurrence, args.month, args.start_month)
+    return {
+        "description": args.description,
+        "amount": args.amount,
+        "type": args.type,
+        "recurrence": recurrence,
+        "category": args.category,
+        "month": args.month,
+        "start_month": args.start_month,
+        "end_month": args.end_month,
+        "id": _new_id(),
+    }
+
+
 def handle_add(args: argparse.Namespace) -> None:
-    data = load_data()
-    txn = Transaction(
-        description=args.description,
-        amount=args.amount,
-        type=args.type,
-        recurrence="recurring" if args.recurring else "one-time",
-        category=args.category,
-        month=args.month,
-        start_month=args.start_month,
-        end_month=args.end_month,
-    )
-    data.setdefault("transactions", []).append(asdict(txn))
-    save_data(data)
-    print(f"Added {txn.type} '{txn.description}' with id {txn.id}")
+    handle_add_many([args])
+
+
+def handle_add_many(args_list: List[argparse.Namespace]) -> None:
+    """Add several transactions with a single append to the data file."""
+    txns = [_build_txn_dict(args) for args in args_list]
+    append_transactions(txns)
+    for txn in txns:
+        print(f"Added {txn['type']} '{txn['description']}' with id {txn['id']}")
 
 
 def handle_list(args: argparse.Namespace) -> None:
-    data = load_data()
-    txns = data.get("transactions", [])
     if args.month:
-        txns = [txn for txn in txns if is_active_in_month(txn, args.month)]
+        _, _, txns = _query_loaded(args.month)
+    else:
+        txns = _load_cached()["transactions"]
     if not txns:
         print("No transactions found.")
         return
 
+    lines = []
     for txn in txns:
         scope = txn["month"] if txn["recurrence"] == "one-time" else f"{txn['start_month']}+"
         end = txn.get("end_month")
         end_text = f" to {end}" if end else ""
-        print(
-            f"[{txn['id']}] {txn['description']} | {txn['type']} | ${txn['amount']:.2f} | {txn['recurrence']} ({scope}{end_text}) | {txn['category']}"
+        lines.append(
+            f"[{txn['id']}] {txn['description']} | {txn['type']} | ${txn['amount']:.2f} | {txn['recurrence']} ({scope}{end_text}) | {txn['category']}\n"
         )
+    # One write for the whole listing instead of a print() per row.
+    sys.stdout.write("".join(lines))
 
 
 def handle_summary(args: argparse.Namespace) -> None:
-    data = load_data()
-    summary = calculate_summary(data, args.month, args.opening_balance)
+    summary = _summary_dict(args.month, args.opening_balance, *_query_loaded(args.month))
     print(f"Cash flow summary for {summary['month']}")
     print(f"Opening balance: ${summary['opening_balance']:.2f}")
     print(f"Total inflows:  ${summary['inflows']:.2f}")
@@ -126,16 +422,25 @@ def handle_summary(args: argparse.Namespace) -> None:
 
     if summary["transactions"]:
         print("\nTransactions contributing to this month:")
+        lines = []
         for txn in summary["transactions"]:
             source = txn["month"] if txn["recurrence"] == "one-time" else txn["start_month"]
-            print(
-                f"- {txn['description']} (${txn['amount']:.2f}, {txn['type']}, {txn['recurrence']}, from {source})"
+            lines.append(
+                f"- {txn['description']} (${txn['amount']:.2f}, {txn['type']}, {txn['recurrence']}, from {source})\n"
             )
+        sys.stdout.write("".join(lines))
+
+
+def handle_format(_: argparse.Namespace) -> None:
+    print(_dumps_pretty(_load_cached()).decode("utf-8"))
 
 
 def handle_reset(_: argparse.Namespace) -> None:
-    if DATA_FILE.exists():
-        DATA_FILE.unlink()
+    _remember(None)
+    existing = [path for path in (DATA_FILE, _legacy_file()) if path is not None and path.exists()]
+    if existing:
+        for path in existing:
+            path.unlink()
         print("Cleared saved cash flow data.")
     else:
         print("No data file to clear.")
@@ -147,8 +452,8 @@ def build_parser() -> argparse.ArgumentParser:
 
     add_parser = subparsers.add_parser("add", help="Add a cash flow item")
     add_parser.add_argument("description", help="Name of the inflow or outflow")
-    add_parser.add_argument("amount", type=float, help="Dollar amount")
-    add_parser.add_argument("type", choices=["inflow", "outflow"], help="Whether this is money in or out")
+    add_parser.add_argument("amount", type=parse_amount, help="Dollar amount")
+    add_parser.add_argument("type", choices=sorted(_VALID_TYPES), help="Whether this is money in or out")
     add_parser.add_argument("category", help="Category label (e.g. rent, salary)")
     add_parser.add_argument("month", type=parse_month, nargs="?", help="Month for one-time items (YYYY-MM)")
     add_parser.add_argument("start_month", type=parse_month, nargs="?", help="Start month for recurring items (YYYY-MM)")
@@ -165,6 +470,9 @@ def build_parser() -> argparse.ArgumentParser:
     summary_parser.add_argument("--opening-balance", type=float, default=0.0, help="Starting balance for the month")
     summary_parser.set_defaults(func=handle_summary)
 
+    format_parser = subparsers.add_parser("format", help="Print saved data as indented JSON")
+    format_parser.set_defaults(func=handle_format)
+
     reset_parser = subparsers.add_parser("reset", help="Clear saved data")
     reset_parser.set_defaults(func=handle_reset)
 
@@ -172,8 +480,10 @@ def build_parser() -> argparse.ArgumentParser:
 
 
 def main(argv: Optional[List[str]] = None) -> None:
-    parser = build_parser()
-    args = parser.parse_args(argv)
+    global _PARSER
+    if _PARSER is None:
+        _PARSER = build_parser()
+    args = _PARSER.parse_args(argv)
     args.func(args)
 
 
@@ -1,13 +1,26 @@
 import json
+import math
 import sys
+import tracemalloc
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
 import cashflow
 
 
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(cashflow, "orjson", None)
+    elif cashflow.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
 def test_calculate_summary_with_recurring_and_one_time(tmp_path, monkeypatch):
     data_file = tmp_path / "cashflow_data.json"
     monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
@@ -74,3 +87,351 @@ def test_is_active_in_month():
     assert not cashflow.is_active_in_month(recurring, "2024-04")
     assert cashflow.is_active_in_month(one_time, "2024-02")
     assert not cashflow.is_active_in_month(one_time, "2024-03")
+
+
+def test_save_and_load_round_trip(tmp_path, monkeypatch, backend):
+    data_file = tmp_path / "cashflow_data.jsonl"
+    monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
+
+    assert cashflow.load_data() == {"transactions": []}
+
+    data = {"transactions": [{"id": "1", "description": "Café", "amount": 4.5}, {"id": "2", "amount": 1}]}
+    cashflow.save_data(data)
+
+    lines = data_file.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == data["transactions"]
+
+    loaded = cashflow.load_data()
+    assert loaded == data
+    loaded["transactions"][0]["amount"] = 99
+    loaded["transactions"].pop()
+    assert cashflow.load_data() == data
+
+    # A different path is never served from the cache, so this reads the bytes back.
+    copy_file = tmp_path / "copy.jsonl"
+    copy_file.write_bytes(data_file.read_bytes())
+    monkeypatch.setattr(cashflow, "DATA_FILE", copy_file)
+    assert cashflow.load_data() == data
+
+
+def test_save_and_load_values_orjson_cannot_encode(tmp_path, monkeypatch, backend):
+    monkeypatch.setattr(cashflow, "DATA_FILE", tmp_path / "cashflow_data.jsonl")
+
+    data = {"transactions": [{"id": "1", "description": "caf\udce9", "amount": 4.5}]}
+    cashflow.save_data(data)
+    assert cashflow.load_data() == data
+
+    cashflow.save_data({"transactions": [{"id": "2", "description": "Old", "amount": float("nan")}]})
+    [txn] = cashflow.load_data()["transactions"]
+    assert math.isnan(txn["amount"])
+
+
+def test_add_rejects_non_finite_amounts(tmp_path, monkeypatch):
+    data_file = tmp_path / "cashflow_data.jsonl"
+    monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
+
+    for amount in ["nan", "inf", "-inf"]:
+        with pytest.raises(SystemExit):
+            cashflow.main(["add", "X", amount, "outflow", "fun", "2024-02"])
+    with pytest.raises(ValueError):
+        cashflow.Transaction("X", float("inf"), "outflow", "one-time", "fun", month="2024-02")
+    assert not data_file.exists()
+
+
+def test_add_many_appends_all_transactions(tmp_path, monkeypatch, capsys):
+    data_file = tmp_path / "cashflow_data.jsonl"
+    monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
+    parser = cashflow.build_parser()
+
+    cashflow.handle_add_many(
+        [
+            parser.parse_args(["add", "Salary", "3000", "inflow", "income", "2024-01"]),
+            parser.parse_args(["add", "Vacation", "500", "outflow", "fun", "2024-02"]),
+        ]
+    )
+    cashflow.main(["add", "Coffee", "4.5", "outflow", "food", "2024-02"])
+
+    stored = [json.loads(line) for line in data_file.read_text().splitlines()]
+    assert [txn["description"] for txn in stored] == ["Salary", "Vacation", "Coffee"]
+    assert capsys.readouterr().out.count("Added ") == 3
+    assert [txn["description"] for txn in cashflow.load_data()["transactions"]] == ["Salary", "Vacation", "Coffee"]
+
+
+def test_load_data_migrates_legacy_json_file(tmp_path, monkeypatch, backend):
+    data_file = tmp_path / "cashflow_data.jsonl"
+    legacy_file = tmp_path / "cashflow_data.json"
+    monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
+    legacy_file.write_text(
+        '{"transactions": [{"id": "1", "description": "Rent", "amount": 1200}, {"id": "2", "amount": NaN}]}'
+    )
+
+    txns = cashflow.load_data()["transactions"]
+
+    assert txns[0] == {"id": "1", "description": "Rent", "amount": 1200}
+    assert math.isnan(txns[1]["amount"])
+    assert not legacy_file.exists()
+    assert len(data_file.read_text().splitlines()) == 2
+
+
+def test_append_after_file_without_trailing_newline(tmp_path, monkeypatch):
+    data_file = tmp_path / "cashflow_data.jsonl"
+    monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
+    data_file.write_bytes(b'{"id":"1"}')
+
+    cashflow.append_transactions([{"id": "2"}])
+
+    assert data_file.read_bytes().splitlines() == [b'{"id":"1"}', b'{"id":"2"}']
+    assert cashflow.load_data() == {"transactions": [{"id": "1"}, {"id": "2"}]}
+
+
+def test_append_that_cannot_serialize_leaves_no_file(tmp_path, monkeypatch):
+    data_file = tmp_path / "cashflow_data.jsonl"
+    monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
+
+    with pytest.raises(TypeError):
+        cashflow.append_transactions([{"id": object()}])
+    assert not data_file.exists()
+
+
+def test_json_named_data_file_is_not_its_own_legacy_file(tmp_path, monkeypatch, capsys):
+    data_file = tmp_path / "cashflow_data.json"
+    monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
+
+    cashflow.main(["add", "Coffee", "4.5", "outflow", "food", "2024-02"])
+    cashflow.main(["add", "Tea", "3", "outflow", "food", "2024-02"])
+    assert [txn["description"] for txn in cashflow.load_data()["transactions"]] == ["Coffee", "Tea"]
+
+    cashflow.main(["reset"])
+    assert not data_file.exists()
+    assert capsys.readouterr().out.endswith("Cleared saved cash flow data.\n")
+
+
+def test_calculate_summary_sees_appended_transactions():
+    data = {
+        "transactions": [
+            {"id": "1", "amount": 100, "type": "inflow", "recurrence": "one-time", "month": "2024-02"},
+        ]
+    }
+    assert cashflow.calculate_summary(data, "2024-02", 0)["inflows"] == 100
+
+    data["transactions"].append(
+        {"id": "2", "amount": 40, "type": "outflow", "recurrence": "recurring", "start_month": "2024-01"}
+    )
+    summary = cashflow.calculate_summary(data, "2024-02", 0)
+
+    assert summary["inflows"] == 100
+    assert summary["outflows"] == 40
+    assert [txn["id"] for txn in summary["transactions"]] == ["1", "2"]
+
+
+def test_calculate_summary_sees_rows_edited_in_place():
+    data = {
+        "transactions": [
+            {"id": "1", "amount": 100, "type": "inflow", "recurrence": "one-time", "month": "2024-02"},
+        ]
+    }
+    assert cashflow.calculate_summary(data, "2024-02", 0)["inflows"] == 100
+
+    data["transactions"][0]["amount"] = 250
+    assert cashflow.calculate_summary(data, "2024-02", 0)["inflows"] == 250
+
+    data["transactions"][0] = {"id": "2", "amount": 75, "type": "inflow", "recurrence": "one-time", "month": "2024-03"}
+    summary = cashflow.calculate_summary(data, "2024-02", 0)
+    assert summary["inflows"] == 0
+    assert summary["transactions"] == []
+
+
+def test_calculate_summary_skips_one_time_rows_without_month():
+    data = {
+        "transactions": [
+            {"id": "1", "amount": 100, "type": "inflow", "recurrence": "one-time", "month": None},
+            {"id": "2", "amount": 40, "type": "outflow", "recurrence": "one-time", "month": "2024-02"},
+        ]
+    }
+
+    summary = cashflow.calculate_summary(data, "2024-02", 0)
+
+    assert summary["inflows"] == 0
+    assert [txn["id"] for txn in summary["transactions"]] == ["2"]
+    assert not cashflow.is_active_in_month(data["transactions"][0], "2024-02")
+
+
+def test_parse_month():
+    assert cashflow.parse_month("2024-02") == "2024-02"
+    assert cashflow.parse_month("1999-12") == "1999-12"
+    for value in ["2024-13", "2024-00", "2024-2", "24-02", "2024/02", "２０２４-02", "2024-0a"]:
+        with pytest.raises(ValueError):
+            cashflow.parse_month(value)
+
+
+def test_transaction_to_dict():
+    txn = cashflow.Transaction("Rent", 1200, "outflow", "recurring", "housing", start_month="2024-01")
+
+    assert txn.to_dict() == {
+        "description": "Rent",
+        "amount": 1200,
+        "type": "outflow",
+        "recurrence": "recurring",
+        "category": "housing",
+        "month": None,
+        "start_month": "2024-01",
+        "end_month": None,
+        "id": txn.id,
+    }
+    assert txn.id
+
+
+def test_format_prints_indented_json(backend, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cashflow, "DATA_FILE", tmp_path / "cashflow_data.jsonl")
+    data = {"transactions": [{"id": "1", "description": "Rent", "amount": 1200}]}
+    cashflow.save_data(data)
+    assert cashflow.DATA_FILE.read_text() == '{"id":"1","description":"Rent","amount":1200}\n'
+
+    cashflow.main(["format"])
+
+    out = capsys.readouterr().out
+    assert json.loads(out) == data
+    assert '\n  "transactions": [\n' in out
+
+
+def test_legacy_migration_pads_single_digit_months(tmp_path, monkeypatch):
+    data_file = tmp_path / "cashflow_data.jsonl"
+    legacy_file = tmp_path / "cashflow_data.json"
+    monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
+    legacy_file.write_text(
+        json.dumps(
+            {
+                "transactions": [
+                    {"id": "1", "recurrence": "one-time", "month": "2024-2", "start_month": None},
+                    {"id": "2", "recurrence": "recurring", "start_month": "2024-1", "end_month": "2024-10"},
+                ]
+            }
+        )
+    )
+
+    txns = cashflow.load_data()["transactions"]
+
+    assert [(txn.get("month"), txn.get("start_month"), txn.get("end_month")) for txn in txns] == [
+        ("2024-02", None, None),
+        (None, "2024-01", "2024-10"),
+    ]
+    assert not legacy_file.exists()
+
+
+def test_legacy_migration_rejects_invalid_months(tmp_path, monkeypatch):
+    data_file = tmp_path / "cashflow_data.jsonl"
+    legacy_file = tmp_path / "cashflow_data.json"
+    monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
+    legacy_file.write_text(json.dumps({"transactions": [{"id": "1", "month": "2024-13", "start_month": None}]}))
+
+    with pytest.raises(ValueError, match="'2024-13'"):
+        cashflow.load_data()
+    assert legacy_file.exists()
+    assert not data_file.exists()
+
+
+def test_list_and_summary_output(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cashflow, "DATA_FILE", tmp_path / "cashflow_data.jsonl")
+    cashflow.save_data(
+        {
+            "transactions": [
+                {"id": "1", "description": "Salary", "amount": 3000, "type": "inflow", "category": "job", "recurrence": "recurring", "month": None, "start_month": "2024-01", "end_month": None},
+                {"id": "2", "description": "Rent", "amount": 1200, "type": "outflow", "category": "housing", "recurrence": "recurring", "month": None, "start_month": "2024-01", "end_month": "2024-06"},
+                {"id": "3", "description": "Vacation", "amount": 500.5, "type": "outflow", "category": "fun", "recurrence": "one-time", "month": "2024-03", "start_month": None, "end_month": None},
+            ]
+        }
+    )
+
+    cashflow.main(["list"])
+    assert capsys.readouterr().out == (
+        "[1] Salary | inflow | $3000.00 | recurring (2024-01+) | job\n"
+        "[2] Rent | outflow | $1200.00 | recurring (2024-01+ to 2024-06) | housing\n"
+        "[3] Vacation | outflow | $500.50 | one-time (2024-03) | fun\n"
+    )
+
+    cashflow.main(["list", "--month", "2024-07"])
+    assert capsys.readouterr().out == "[1] Salary | inflow | $3000.00 | recurring (2024-01+) | job\n"
+
+    cashflow.main(["summary", "2024-03", "--opening-balance", "100"])
+    assert capsys.readouterr().out == (
+        "Cash flow summary for 2024-03\n"
+        "Opening balance: $100.00\n"
+        "Total inflows:  $3000.00\n"
+        "Total outflows: $1700.50\n"
+        "Net income:      $1299.50\n"
+        "Closing balance: $1399.50\n"
+        "\n"
+        "Transactions contributing to this month:\n"
+        "- Salary ($3000.00, inflow, recurring, from 2024-01)\n"
+        "- Rent ($1200.00, outflow, recurring, from 2024-01)\n"
+        "- Vacation ($500.50, outflow, one-time, from 2024-03)\n"
+    )
+
+
+def test_load_data_handles_empty_and_blank_lines(tmp_path, monkeypatch):
+    data_file = tmp_path / "cashflow_data.jsonl"
+    monkeypatch.setattr(cashflow, "DATA_FILE", data_file)
+
+    data_file.write_bytes(b"")
+    assert cashflow.load_data() == {"transactions": []}
+
+    data_file.write_bytes(b'{"id":"1"}\n\n{"id":"2"}')
+    assert cashflow.load_data() == {"transactions": [{"id": "1"}, {"id": "2"}]}
+
+
+def test_repeated_cli_queries_match_a_fresh_scan(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cashflow, "DATA_FILE", tmp_path / "cashflow_data.jsonl")
+    cashflow.main(["add", "Vacation", "500", "outflow", "fun", "2024-02"])
+    cashflow.main(["add", "Bonus", "900", "inflow", "income", "2024-03"])
+    cashflow.append_transactions(
+        [
+            cashflow.Transaction(
+                "Gig", 100, "inflow", "recurring", "income", start_month="2024-02", end_month="2024-03"
+            ).to_dict()
+        ]
+    )
+    data = cashflow.load_data()
+    months = ["2024-01", "2024-02", "2024-03", "2024-04"]
+    capsys.readouterr()
+
+    fresh = {}
+    for month in months:
+        # Rewriting the file makes the next query start from a plain scan again.
+        cashflow.save_data(data)
+        cashflow.main(["summary", month])
+        cashflow.main(["list", "--month", month])
+        fresh[month] = capsys.readouterr().out
+        inflows = cashflow.calculate_summary(data, month, 0)["inflows"]
+        assert f"Total inflows:  ${inflows:.2f}\n" in fresh[month]
+
+    for month in months + months[::-1]:
+        cashflow.main(["summary", month])
+        cashflow.main(["list", "--month", month])
+        assert capsys.readouterr().out == fresh[month]
+
+
+def test_queries_over_far_apart_months_stay_small(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cashflow, "DATA_FILE", tmp_path / "cashflow_data.jsonl")
+    txns = [
+        {"id": "first", "description": "First", "amount": 1, "type": "inflow", "category": "x", "recurrence": "one-time", "month": "0001-01"},
+        {"id": "last", "description": "Last", "amount": 1, "type": "inflow", "category": "x", "recurrence": "one-time", "month": "9999-12"},
+    ] + [
+        {"id": str(i), "description": "Sub", "amount": 1, "type": "outflow", "category": "x", "recurrence": "recurring", "start_month": "0001-01"}
+        for i in range(200)
+    ]
+    cashflow.save_data({"transactions": txns})
+    cashflow.load_data()
+
+    tracemalloc.start()
+    try:
+        for month in ["5000-06", "5000-07", "9999-12"]:
+            cashflow.main(["summary", month])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Expanding every row over the ten thousand years in between would take hundreds of megabytes.
+    assert peak < 1_000_000
+    out = capsys.readouterr().out
+    assert out.count("Total outflows: $200.00\n") == 3
+    assert out.count("Total inflows:  $1.00\n") == 1